@@ -15,24 +15,39 @@ License: Proprietary - For deployment through appropriate legal channels
 """
 
 import os
+import tempfile
 import asyncio
 import hashlib
 import hmac
 import secrets
-import uuid
-import json
-from typing import Dict, List, Optional, Any, Union
+import warnings
+import orjson
+from typing import Callable, Dict, List, Optional, Any, Union
 from datetime import datetime, timedelta, timezone
 from enum import Enum
 from dataclasses import dataclass
-from pydantic import BaseModel, Field, EmailStr, validator
+from functools import cached_property, lru_cache
+from pydantic import BaseModel, Field, EmailStr
 import logging
+import queue
+from logging.handlers import QueueHandler, QueueListener
+import aiohttp
 from cryptography.fernet import Fernet
 from cryptography.hazmat.primitives import hashes, serialization
-from cryptography.hazmat.primitives.asymmetric import rsa, padding
+from cryptography.hazmat.primitives.asymmetric import ed25519, rsa
 from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
 import base64
 
+try:
+    # Rust Fernet implementation; same token format as cryptography's Fernet
+    from rfernet import Fernet as RustFernet
+except ImportError:
+    RustFernet = None
+
+def _new_id() -> str:
+    """Opaque 128-bit random identifier for transactions, sessions and audit records"""
+    return secrets.token_hex(16)
+
 # Configure logging for financial operations
 financial_logger = logging.getLogger('financial_infrastructure')
 financial_logger.setLevel(logging.INFO)
@@ -44,62 +59,119 @@ class SecurityConfig:
     def __init__(self):
         self.encryption_key = self._generate_or_load_encryption_key()
         self.cipher_suite = Fernet(self.encryption_key)
-        self.rsa_private_key = self._generate_or_load_rsa_key()
-        self.rsa_public_key = self.rsa_private_key.public_key()
-        
-    def _generate_or_load_encryption_key(self) -> bytes:
-        """Generate or load encryption key for sensitive data"""
-        key_file = os.path.join(os.path.dirname(__file__), '.encryption_key')
-        if os.path.exists(key_file):
+        self._fast_cipher = RustFernet(self.encryption_key.decode()) if RustFernet else None
+        self.signing_key = self._generate_or_load_signing_key()
+        self.verify_key = self.signing_key.public_key()
+        
+    @cached_property
+    def rsa_private_key(self) -> rsa.RSAPrivateKey:
+        """Legacy RSA signing key, loaded or generated on first use"""
+        return self._generate_or_load_rsa_key()
+    
+    @cached_property
+    def rsa_public_key(self) -> rsa.RSAPublicKey:
+        """Public half of the legacy RSA signing key"""
+        return self.rsa_private_key.public_key()
+    
+    @staticmethod
+    def _load_or_create_key_file(filename: str, generate: Callable[[], bytes]) -> bytes:
+        """Read a key file next to this module, creating it with generate() (mode 0600) if missing"""
+        key_file = os.path.join(os.path.dirname(__file__), filename)
+        try:
             with open(key_file, 'rb') as f:
                 return f.read()
-        else:
-            key = Fernet.generate_key()
-            with open(key_file, 'wb') as f:
+        except FileNotFoundError:
+            pass
+        
+        key = generate()
+        # Write the complete key to a private temp file, then hard-link it into place:
+        # link() fails if the name exists, and readers never see a partly written key
+        fd, tmp_file = tempfile.mkstemp(dir=os.path.dirname(key_file), prefix=filename + '.')
+        try:
+            with os.fdopen(fd, 'wb') as f:
                 f.write(key)
-            os.chmod(key_file, 0o600)  # Restrict access
-            return key
+                f.flush()
+                os.fsync(f.fileno())
+            try:
+                os.link(tmp_file, key_file)
+            except FileExistsError:
+                # Another worker published its key first; use that one instead
+                with open(key_file, 'rb') as f:
+                    return f.read()
+        finally:
+            os.unlink(tmp_file)
+        return key
+    
+    @staticmethod
+    def _private_key_pem(private_key) -> bytes:
+        """Serialize a private key as unencrypted PKCS8 PEM"""
+        return private_key.private_bytes(
+            encoding=serialization.Encoding.PEM,
+            format=serialization.PrivateFormat.PKCS8,
+            encryption_algorithm=serialization.NoEncryption()
+        )
+    
+    def _generate_or_load_encryption_key(self) -> bytes:
+        """Generate or load encryption key for sensitive data"""
+        return self._load_or_create_key_file('.encryption_key', Fernet.generate_key)
     
     def _generate_or_load_rsa_key(self) -> rsa.RSAPrivateKey:
         """Generate or load RSA key pair for digital signatures"""
-        key_file = os.path.join(os.path.dirname(__file__), '.rsa_private_key.pem')
-        if os.path.exists(key_file):
-            with open(key_file, 'rb') as f:
-                return serialization.load_pem_private_key(f.read(), password=None)
-        else:
-            private_key = rsa.generate_private_key(
+        pem = self._load_or_create_key_file('.rsa_private_key.pem', lambda: self._private_key_pem(
+            rsa.generate_private_key(
                 public_exponent=65537,
-                key_size=4096,
-            )
-            pem = private_key.private_bytes(
-                encoding=serialization.Encoding.PEM,
-                format=serialization.PrivateFormat.PKCS8,
-                encryption_algorithm=serialization.NoEncryption()
+                key_size=4096 if os.environ.get("ENVIRONMENT") == "production" else 2048,
             )
-            with open(key_file, 'wb') as f:
-                f.write(pem)
-            os.chmod(key_file, 0o600)
-            return private_key
+        ))
+        return serialization.load_pem_private_key(pem, password=None)
+    
+    def _generate_or_load_signing_key(self) -> ed25519.Ed25519PrivateKey:
+        """Generate or load Ed25519 key for digital signatures"""
+        pem = self._load_or_create_key_file(
+            '.ed25519_private_key.pem',
+            lambda: self._private_key_pem(ed25519.Ed25519PrivateKey.generate())
+        )
+        return serialization.load_pem_private_key(pem, password=None)
     
     def encrypt_sensitive_data(self, data: str) -> str:
         """Encrypt sensitive financial data"""
+        if self._fast_cipher is not None:
+            return self._fast_cipher.encrypt(data.encode())
         return self.cipher_suite.encrypt(data.encode()).decode()
     
+    def encrypt_many(self, items: List[str]) -> List[str]:
+        """Encrypt several values, resolving the cipher once for the whole batch"""
+        if self._fast_cipher is not None:
+            encrypt = self._fast_cipher.encrypt
+            return [encrypt(item.encode()) for item in items]
+        encrypt = self.cipher_suite.encrypt
+        return [encrypt(item.encode()).decode() for item in items]
+    
     def decrypt_sensitive_data(self, encrypted_data: str) -> str:
         """Decrypt sensitive financial data"""
+        if self._fast_cipher is not None:
+            return self._fast_cipher.decrypt(encrypted_data).decode()
         return self.cipher_suite.decrypt(encrypted_data.encode()).decode()
     
     def sign_data(self, data: str) -> str:
-        """Create digital signature for data integrity"""
-        signature = self.rsa_private_key.sign(
-            data.encode(),
-            padding.PSS(
-                mgf=padding.MGF1(hashes.SHA256()),
-                salt_length=padding.PSS.MAX_LENGTH
-            ),
-            hashes.SHA256()
+        """Create Ed25519 digital signature for data integrity"""
+        return base64.b64encode(self.signing_key.sign(data.encode())).decode()
+
+@lru_cache(maxsize=1)
+def get_security_config() -> SecurityConfig:
+    """Process-wide SecurityConfig, so key files are loaded (or generated) once"""
+    return SecurityConfig()
+
+def _resolve_security(security: Optional[SecurityConfig]) -> SecurityConfig:
+    """Use the injected SecurityConfig; constructing a subsystem without one is deprecated"""
+    if security is None:
+        warnings.warn(
+            "Pass a SecurityConfig explicitly; the implicit shared instance is deprecated",
+            DeprecationWarning,
+            stacklevel=3
         )
-        return base64.b64encode(signature).decode()
+        return get_security_config()
+    return security
 
 # Financial Data Models
 class TransactionType(str, Enum):
@@ -136,7 +208,7 @@ class BankAccountVerification(BaseModel):
     account_id: str
     routing_number: str
     account_number: str = Field(..., description="Encrypted account number")
-    account_type: str = Field(..., regex="^(checking|savings)$")
+    account_type: str = Field(..., pattern="^(checking|savings)$")
     bank_name: str
     verification_status: str = Field(default="pending")
     micro_deposits_sent: bool = Field(default=False)
@@ -170,7 +242,7 @@ class AMLTransaction(BaseModel):
 class KYCDocument(BaseModel):
     document_id: str
     user_id: str
-    document_type: str = Field(..., regex="^(drivers_license|passport|ssn_card|utility_bill|bank_statement)$")
+    document_type: str = Field(..., pattern="^(drivers_license|passport|ssn_card|utility_bill|bank_statement)$")
     document_url: str = Field(..., description="Encrypted storage URL")
     upload_date: datetime
     verification_status: str = Field(default="pending")
@@ -187,6 +259,35 @@ class MultisigWallet(BaseModel):
     balance: float = Field(default=0.0)
     is_active: bool = Field(default=True)
 
+# AML amount rules (threshold, risk weight, flag), applied as amount > threshold
+AML_AMOUNT_RULES = (
+    (10000.0, 30.0, "HIGH_AMOUNT_CTR"),  # CTR threshold
+    (3000.0, 15.0, "ELEVATED_AMOUNT"),   # Suspicious activity threshold
+)
+
+def aml_risk_level(risk_score: float) -> RiskLevel:
+    """Map an AML risk score onto a risk level"""
+    if risk_score >= 75:
+        return RiskLevel.CRITICAL
+    elif risk_score >= 50:
+        return RiskLevel.HIGH
+    elif risk_score >= 25:
+        return RiskLevel.MEDIUM
+    return RiskLevel.LOW
+
+# KYC onboarding risk: base score plus a weight for applicants under the age of majority
+KYC_BASE_RISK_SCORE = 10.0
+KYC_UNDERAGE_RISK_WEIGHT = 50.0
+KYC_MINIMUM_AGE = 18
+
+def kyc_risk_level(risk_score: float) -> RiskLevel:
+    """Map an initial KYC risk score onto a risk level"""
+    if risk_score >= 75:
+        return RiskLevel.HIGH
+    elif risk_score >= 50:
+        return RiskLevel.MEDIUM
+    return RiskLevel.LOW
+
 # Banking API Integration Templates
 class PlaidIntegration:
     """Plaid API integration for bank account linking and verification"""
@@ -196,6 +297,29 @@ class PlaidIntegration:
         self.secret = secret
         self.environment = environment
         self.base_url = self._get_base_url()
+        self._session: Optional[aiohttp.ClientSession] = None
+    
+    async def open(self) -> None:
+        """Open the pooled HTTP session reused by all Plaid API calls"""
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                base_url=self.base_url,
+                connector=aiohttp.TCPConnector(limit=32, ttl_dns_cache=300),
+                timeout=aiohttp.ClientTimeout(total=30)
+            )
+    
+    async def close(self) -> None:
+        """Close the pooled HTTP session"""
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+    
+    async def __aenter__(self) -> "PlaidIntegration":
+        await self.open()
+        return self
+    
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        await self.close()
     
     def _get_base_url(self) -> str:
         """Get Plaid API base URL based on environment"""
@@ -212,7 +336,7 @@ class PlaidIntegration:
         return {
             "link_token": f"link_token_{secrets.token_hex(16)}",
             "expiration": (datetime.now(timezone.utc) + timedelta(hours=1)).isoformat(),
-            "request_id": str(uuid.uuid4())
+            "request_id": _new_id()
         }
     
     async def exchange_public_token(self, public_token: str) -> Dict[str, Any]:
@@ -221,7 +345,7 @@ class PlaidIntegration:
         return {
             "access_token": f"access_token_{secrets.token_hex(32)}",
             "item_id": f"item_{secrets.token_hex(16)}",
-            "request_id": str(uuid.uuid4())
+            "request_id": _new_id()
         }
     
     async def get_accounts(self, access_token: str) -> List[Dict[str, Any]]:
@@ -255,13 +379,13 @@ class PlaidIntegration:
 class ACHProcessor:
     """ACH processing for direct deposits and withdrawals"""
     
-    def __init__(self, processor_config: Dict[str, str]):
+    def __init__(self, processor_config: Dict[str, str], security: Optional[SecurityConfig] = None):
         self.config = processor_config
-        self.security = SecurityConfig()
+        self.security = _resolve_security(security)
     
     async def initiate_direct_deposit(self, deposit_request: DirectDepositSetup) -> Dict[str, Any]:
         """Initiate ACH direct deposit"""
-        transaction_id = str(uuid.uuid4())
+        transaction_id = _new_id()
         
         # Encrypt sensitive account information
         encrypted_account = self.security.encrypt_sensitive_data(deposit_request.account_number)
@@ -278,18 +402,32 @@ class ACHProcessor:
             "created_at": datetime.now(timezone.utc).isoformat()
         }
         
-        financial_logger.info(f"Direct deposit initiated: {transaction_id}")
+        financial_logger.info("Direct deposit initiated: %s", transaction_id)
         return ach_transaction
     
     async def process_withdrawal(self, user_id: str, amount: float, destination_account: str) -> Dict[str, Any]:
         """Process ACH withdrawal to external account"""
-        transaction_id = str(uuid.uuid4())
+        transaction_id = _new_id()
         
         # Perform AML checks
         aml_result = await self._perform_aml_check(user_id, amount, "withdrawal")
         
+        return self._build_withdrawal(
+            transaction_id, amount, destination_account, aml_result,
+            datetime.now(timezone.utc).isoformat()
+        )
+    
+    def _build_withdrawal(
+        self, 
+        transaction_id: str, 
+        amount: float, 
+        destination_account: str, 
+        aml_result: Dict[str, Any],
+        created_at: str
+    ) -> Dict[str, Any]:
+        """Build the withdrawal record, or the blocked result when AML risk is critical"""
         if aml_result["risk_level"] == RiskLevel.CRITICAL:
-            financial_logger.warning(f"Withdrawal blocked for AML: {transaction_id}")
+            financial_logger.warning("Withdrawal blocked for AML: %s", transaction_id)
             return {
                 "transaction_id": transaction_id,
                 "status": "blocked",
@@ -305,10 +443,10 @@ class ACHProcessor:
             "destination_account": self.security.encrypt_sensitive_data(destination_account),
             "status": "processing",
             "risk_score": aml_result["risk_score"],
-            "created_at": datetime.now(timezone.utc).isoformat()
+            "created_at": created_at
         }
         
-        financial_logger.info(f"Withdrawal processed: {transaction_id}")
+        financial_logger.info("Withdrawal processed: %s", transaction_id)
         return withdrawal
     
     async def _perform_aml_check(self, user_id: str, amount: float, transaction_type: str) -> Dict[str, Any]:
@@ -318,39 +456,26 @@ class ACHProcessor:
         flags = []
         
         # Check transaction amount thresholds
-        if amount > 10000:  # CTR threshold
-            flags.append("HIGH_AMOUNT_CTR")
-            risk_score += 30.0
-        
-        if amount > 3000:  # Suspicious activity threshold
-            flags.append("ELEVATED_AMOUNT")
-            risk_score += 15.0
-        
-        # Determine risk level
-        if risk_score >= 75:
-            risk_level = RiskLevel.CRITICAL
-        elif risk_score >= 50:
-            risk_level = RiskLevel.HIGH
-        elif risk_score >= 25:
-            risk_level = RiskLevel.MEDIUM
-        else:
-            risk_level = RiskLevel.LOW
+        for threshold, weight, flag in AML_AMOUNT_RULES:
+            if amount > threshold:
+                flags.append(flag)
+                risk_score += weight
         
         return {
             "risk_score": risk_score,
-            "risk_level": risk_level,
+            "risk_level": aml_risk_level(risk_score),
             "flags": flags
         }
 
 class KYCProcessor:
     """KYC (Know Your Customer) processing and compliance"""
     
-    def __init__(self):
-        self.security = SecurityConfig()
+    def __init__(self, security: Optional[SecurityConfig] = None):
+        self.security = _resolve_security(security)
     
     async def initiate_kyc_process(self, user_id: str, user_data: Dict[str, Any]) -> Dict[str, Any]:
         """Initiate KYC verification process"""
-        kyc_session_id = str(uuid.uuid4())
+        kyc_session_id = _new_id()
         
         kyc_session = {
             "session_id": kyc_session_id,
@@ -366,7 +491,7 @@ class KYCProcessor:
             "created_at": datetime.now(timezone.utc).isoformat()
         }
         
-        financial_logger.info(f"KYC process initiated: {kyc_session_id}")
+        financial_logger.info("KYC process initiated: %s", kyc_session_id)
         return kyc_session
     
     async def submit_kyc_document(self, session_id: str, document: KYCDocument) -> Dict[str, Any]:
@@ -386,7 +511,7 @@ class KYCProcessor:
             "processed_at": datetime.now(timezone.utc).isoformat()
         }
         
-        financial_logger.info(f"KYC document processed: {document.document_id}")
+        financial_logger.info("KYC document processed: %s", document.document_id)
         return result
     
     async def _verify_document(self, document: KYCDocument) -> Dict[str, Any]:
@@ -405,33 +530,25 @@ class KYCProcessor:
     
     async def _assess_initial_risk(self, user_data: Dict[str, Any]) -> Dict[str, Any]:
         """Assess initial risk level based on user data"""
-        risk_score = 10.0  # Base risk
+        risk_score = KYC_BASE_RISK_SCORE
         risk_factors = []
         
         # Example risk assessment logic
-        if user_data.get("age", 0) < 18:
+        if user_data.get("age", 0) < KYC_MINIMUM_AGE:
             risk_factors.append("UNDERAGE")
-            risk_score += 50.0
-        
-        # Determine risk level
-        if risk_score >= 75:
-            risk_level = RiskLevel.HIGH
-        elif risk_score >= 50:
-            risk_level = RiskLevel.MEDIUM
-        else:
-            risk_level = RiskLevel.LOW
+            risk_score += KYC_UNDERAGE_RISK_WEIGHT
         
         return {
             "risk_score": risk_score,
-            "risk_level": risk_level,
+            "risk_level": kyc_risk_level(risk_score),
             "factors": risk_factors
         }
 
 class MultisigWalletManager:
     """Multi-signature wallet management for Bitcoin/cryptocurrency"""
     
-    def __init__(self):
-        self.security = SecurityConfig()
+    def __init__(self, security: Optional[SecurityConfig] = None):
+        self.security = _resolve_security(security)
     
     async def create_multisig_wallet(
         self, 
@@ -443,7 +560,7 @@ class MultisigWalletManager:
         if required_signatures > len(signers):
             raise ValueError("Required signatures cannot exceed number of signers")
         
-        wallet_id = str(uuid.uuid4())
+        wallet_id = _new_id()
         # In production, integrate with actual Bitcoin wallet library
         wallet_address = f"bc1q{secrets.token_hex(32)}"
         
@@ -458,7 +575,7 @@ class MultisigWalletManager:
             is_active=True
         )
         
-        financial_logger.info(f"Multisig wallet created: {wallet_id}")
+        financial_logger.info("Multisig wallet created: %s", wallet_id)
         return wallet
     
     async def initiate_transaction(
@@ -470,7 +587,8 @@ class MultisigWalletManager:
     ) -> Dict[str, Any]:
         """Initiate multi-signature transaction"""
         
-        transaction_id = str(uuid.uuid4())
+        transaction_id = _new_id()
+        now = datetime.now(timezone.utc)
         
         # Create unsigned transaction
         unsigned_tx = {
@@ -482,11 +600,11 @@ class MultisigWalletManager:
             "signatures_required": 2,  # From wallet config
             "signatures_collected": [],
             "status": "pending_signatures",
-            "created_at": datetime.now(timezone.utc).isoformat(),
-            "expires_at": (datetime.now(timezone.utc) + timedelta(hours=24)).isoformat()
+            "created_at": now.isoformat(),
+            "expires_at": (now + timedelta(hours=24)).isoformat()
         }
         
-        financial_logger.info(f"Multisig transaction initiated: {transaction_id}")
+        financial_logger.info("Multisig transaction initiated: %s", transaction_id)
         return unsigned_tx
     
     async def sign_transaction(
@@ -513,19 +631,19 @@ class MultisigWalletManager:
             "signed_at": datetime.now(timezone.utc).isoformat()
         }
         
-        financial_logger.info(f"Transaction signed: {transaction_id} by {signer_id}")
+        financial_logger.info("Transaction signed: %s by %s", transaction_id, signer_id)
         return result
     
     async def _verify_signature(self, transaction_id: str, signer_id: str, signature: str) -> bool:
         """Verify cryptographic signature"""
-        # Template signature verification - integrate with actual crypto library
+        # Template signature verification - signer public keys are not registered yet
         return True
 
 class ComplianceMonitor:
     """Real-time compliance monitoring and reporting"""
     
-    def __init__(self):
-        self.security = SecurityConfig()
+    def __init__(self, security: Optional[SecurityConfig] = None):
+        self.security = _resolve_security(security)
     
     async def monitor_transaction(self, transaction: AMLTransaction) -> Dict[str, Any]:
         """Monitor transaction for compliance violations"""
@@ -563,7 +681,7 @@ class ComplianceMonitor:
         if compliance_result["flags"]:
             compliance_result["compliance_status"] = "flagged"
         
-        financial_logger.info(f"Compliance check completed: {transaction.transaction_id}")
+        financial_logger.info("Compliance check completed: %s", transaction.transaction_id)
         return compliance_result
     
     async def _check_ofac_sanctions(self, user_id: str) -> Dict[str, Any]:
@@ -582,7 +700,7 @@ class ComplianceMonitor:
     ) -> Dict[str, Any]:
         """Generate compliance report for regulatory submission"""
         
-        report_id = str(uuid.uuid4())
+        report_id = _new_id()
         
         # Template compliance report
         report = {
@@ -600,18 +718,18 @@ class ComplianceMonitor:
         }
         
         # Sign the report for integrity
-        report_data = json.dumps(report, sort_keys=True)
+        report_data = orjson.dumps(report, option=orjson.OPT_SORT_KEYS).decode()
         report["digital_signature"] = self.security.sign_data(report_data)
         
-        financial_logger.info(f"Compliance report generated: {report_id}")
+        financial_logger.info("Compliance report generated: %s", report_id)
         return report
 
 # Audit Trail System
 class AuditLogger:
     """Comprehensive audit logging for financial operations"""
     
-    def __init__(self):
-        self.security = SecurityConfig()
+    def __init__(self, security: Optional[SecurityConfig] = None):
+        self.security = _resolve_security(security)
     
     async def log_financial_action(
         self, 
@@ -622,15 +740,29 @@ class AuditLogger:
     ) -> str:
         """Log financial action with comprehensive audit trail"""
         
-        audit_id = str(uuid.uuid4())
+        audit_record = self.create_audit_record(action_type, user_id, details, sensitive_data)
+        
+        financial_logger.info("Financial action logged: %s - %s", action_type, audit_record['audit_id'])
+        return audit_record["audit_id"]
+    
+    def create_audit_record(
+        self, 
+        action_type: str, 
+        user_id: str, 
+        details: Dict[str, Any],
+        sensitive_data: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """Build an integrity-hashed audit record ready for persistence"""
+        
+        audit_id = _new_id()
         
         # Encrypt sensitive data
         encrypted_sensitive = None
         if sensitive_data:
-            encrypted_sensitive = {
-                key: self.security.encrypt_sensitive_data(str(value))
-                for key, value in sensitive_data.items()
-            }
+            encrypted_sensitive = dict(zip(
+                sensitive_data,
+                self.security.encrypt_many([str(value) for value in sensitive_data.values()])
+            ))
         
         audit_record = {
             "audit_id": audit_id,
@@ -645,12 +777,11 @@ class AuditLogger:
             "integrity_hash": None    # Will be set below
         }
         
-        # Create integrity hash
-        record_string = json.dumps(audit_record, sort_keys=True)
-        audit_record["integrity_hash"] = hashlib.sha256(record_string.encode()).hexdigest()
+        # Create integrity hash over the canonical (sorted-key) JSON bytes
+        record_bytes = orjson.dumps(audit_record, option=orjson.OPT_SORT_KEYS)
+        audit_record["integrity_hash"] = hashlib.sha256(record_bytes).hexdigest()
         
-        financial_logger.info(f"Financial action logged: {action_type} - {audit_id}")
-        return audit_id
+        return audit_record
 
 # Production Deployment Configuration
 @dataclass
@@ -702,19 +833,42 @@ class ProductionConfig:
 class FinancialInfrastructure:
     """Main financial infrastructure orchestrator"""
     
-    def __init__(self, config: ProductionConfig):
+    def __init__(self, config: ProductionConfig, security: Optional[SecurityConfig] = None):
         self.config = config
-        self.security = SecurityConfig()
+        self.security = security or get_security_config()
         self.plaid = PlaidIntegration(
             config.plaid_client_id, 
             config.plaid_secret, 
             config.plaid_environment
         )
-        self.ach_processor = ACHProcessor({"environment": config.environment})
-        self.kyc_processor = KYCProcessor()
-        self.multisig_manager = MultisigWalletManager()
-        self.compliance_monitor = ComplianceMonitor()
-        self.audit_logger = AuditLogger()
+        self.ach_processor = ACHProcessor({"environment": config.environment}, self.security)
+        self.kyc_processor = KYCProcessor(self.security)
+        self.multisig_manager = MultisigWalletManager(self.security)
+        self.compliance_monitor = ComplianceMonitor(self.security)
+        self.audit_logger = AuditLogger(self.security)
+        self._log_handler: Optional[QueueHandler] = None
+        self._log_listener: Optional[QueueListener] = None
+    
+    def _start_log_listener(self) -> None:
+        """Hand financial log records to a queue so handler I/O runs on a listener thread"""
+        root_handlers = logging.getLogger().handlers
+        if self._log_listener is not None or not root_handlers:
+            return
+        log_queue = queue.SimpleQueue()
+        self._log_listener = QueueListener(log_queue, *root_handlers, respect_handler_level=True)
+        self._log_handler = QueueHandler(log_queue)
+        financial_logger.addHandler(self._log_handler)
+        financial_logger.propagate = False
+        self._log_listener.start()
+    
+    def _stop_log_listener(self) -> None:
+        """Flush queued log records and restore direct logging"""
+        if self._log_listener is None:
+            return
+        financial_logger.removeHandler(self._log_handler)
+        financial_logger.propagate = True
+        self._log_listener.stop()
+        self._log_listener = self._log_handler = None
     
     async def initialize(self) -> Dict[str, Any]:
         """Initialize financial infrastructure"""
@@ -740,9 +894,17 @@ class FinancialInfrastructure:
             "initialized_at": datetime.now(timezone.utc).isoformat()
         }
         
+        await self.plaid.open()
+        self._start_log_listener()
+        
         financial_logger.info("Financial infrastructure initialized successfully")
         return initialization_result
     
+    async def close(self) -> None:
+        """Release network resources held by the integrations and flush queued logs"""
+        await self.plaid.close()
+        self._stop_log_listener()
+    
     async def health_check(self) -> Dict[str, Any]:
         """Comprehensive health check of all financial services"""
         
@@ -795,6 +957,7 @@ __all__ = [
     'FinancialInfrastructure',
     'ProductionConfig', 
     'SecurityConfig',
+    'get_security_config',
     'PlaidIntegration',
     'ACHProcessor', 
     'KYCProcessor',
@@ -1,14 +1,23 @@
 from fastapi import FastAPI, APIRouter, HTTPException, Depends, status, Request
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 from dotenv import load_dotenv
 from motor.motor_asyncio import AsyncIOMotorClient
-from pydantic import BaseModel, Field, EmailStr
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+from pydantic import BaseModel, Field, EmailStr, TypeAdapter
 from typing import List, Optional, Dict, Any
 from datetime import datetime, timedelta, timezone
 from passlib.context import CryptContext
-from jose import JWTError, jwt
+import jwt
+from jwt import InvalidTokenError
+from cachetools import TTLCache
+from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor
 import os
+import asyncio
+import hashlib
 import logging
 import uuid
 import stripe
@@ -22,24 +31,48 @@ load_dotenv(os.path.join(ROOT_DIR, '.env'))
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# MongoDB connection
+# MongoDB connection. Dates are stored as BSON datetimes and decoded as
+# UTC-aware datetimes.
 mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
+client = AsyncIOMotorClient(mongo_url, tz_aware=True)
 db = client[os.environ['DB_NAME']]
 
-# Security configuration - using pbkdf2_sha256 instead of bcrypt to avoid 72-byte limit issues
-pwd_context = CryptContext(schemes=["pbkdf2_sha256"], deprecated="auto")
+# Security configuration - argon2id (OWASP parameters) for new hashes; legacy
+# pbkdf2_sha256 hashes still verify and are upgraded on next login
+pwd_context = CryptContext(
+    schemes=["argon2", "pbkdf2_sha256"],
+    deprecated="auto",
+    argon2__type="ID",
+    argon2__memory_cost=19456,
+    argon2__time_cost=2,
+    argon2__parallelism=1
+)
 SECRET_KEY = os.environ.get("JWT_SECRET", secrets.token_urlsafe(32))
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30 * 24  # 30 days
 
+# Password hashing is CPU- and memory-bound (argon2id uses ~19 MiB per hash);
+# cap concurrent hashes at the core count instead of the shared default pool
+password_hash_executor = ThreadPoolExecutor(max_workers=os.cpu_count() or 1, thread_name_prefix="pwhash")
+
+# Verified JWT payloads keyed by sha256(token); only successful decodes are cached
+_jwt_cache = TTLCache(maxsize=10000, ttl=30)
+
+# Authenticated users keyed by sha256(token), stored with the token's exp;
+# profile staleness is bounded by the TTL and logout evicts the entry
+_user_cache = TTLCache(maxsize=5000, ttl=60)
+
 # Stripe configuration with emergentintegrations
 from emergentintegrations.payments.stripe.checkout import StripeCheckout, CheckoutSessionResponse, CheckoutStatusResponse, CheckoutSessionRequest
 
 stripe_api_key = os.environ.get("STRIPE_API_KEY", "sk_test_emergent")
 
+# Fixed BTC/USD rate for simulated Lightning invoices. When this comes from a
+# price API, cache it for ~30s rather than fetching per invoice.
+BTC_USD_RATE = 45000
+
 # Create FastAPI app
-app = FastAPI(title="Paymentus Clone API", version="1.0.0")
+app = FastAPI(title="Paymentus Clone API", version="1.0.0", default_response_class=ORJSONResponse)
 
 # CORS middleware
 app.add_middleware(
@@ -52,6 +85,10 @@ app.add_middleware(
 
 # Security
 security = HTTPBearer()
+optional_security = HTTPBearer(auto_error=False)
+
+def token_cache_key(token: str) -> str:
+    return hashlib.sha256(token.encode()).hexdigest()
 
 # Pydantic Models
 class UserCreate(BaseModel):
@@ -96,6 +133,10 @@ class Bill(BaseModel):
     description: Optional[str] = None
     created_at: datetime
 
+BILL_UPDATE_FIELDS = frozenset({
+    "biller_name", "account_number", "amount", "due_date", "status", "bill_type", "description"
+})
+
 class PaymentMethodCreate(BaseModel):
     type: str = Field(..., pattern="^(credit_card|bank_account|bitcoin)$")
     card_number: Optional[str] = None
@@ -151,13 +192,22 @@ class LightningInvoice(BaseModel):
     expires_at: datetime
     memo: str
 
+# Batch validators for list endpoints; pydantic-core also parses legacy ISO date strings
+bill_list_adapter = TypeAdapter(List[Bill])
+payment_method_list_adapter = TypeAdapter(List[PaymentMethod])
+transaction_list_adapter = TypeAdapter(List[Transaction])
+
 # Helper functions
-def verify_password(plain_password, hashed_password):
-    return pwd_context.verify(plain_password, hashed_password)
+def verify_and_update_password(plain_password, hashed_password):
+    return pwd_context.verify_and_update(plain_password, hashed_password)
 
 def get_password_hash(password):
     return pwd_context.hash(password)
 
+async def run_password_hash(func, *args):
+    """Run a password hashing function on the dedicated executor"""
+    return await asyncio.get_running_loop().run_in_executor(password_hash_executor, func, *args)
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
     if expires_delta:
@@ -174,40 +224,93 @@ async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(s
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
+    token = credentials.credentials
+    cache_key = token_cache_key(token)
+    now_ts = datetime.now(timezone.utc).timestamp()
+    cached_user = _user_cache.get(cache_key)
+    if cached_user is not None and cached_user[1] > now_ts:
+        return cached_user[0]
+    
     try:
-        token = credentials.credentials
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        payload = _jwt_cache.get(cache_key)
+        if payload is None or payload["exp"] <= now_ts:
+            payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+            if payload.get("exp", 0) > now_ts:
+                _jwt_cache[cache_key] = payload
         user_id: str = payload.get("sub")
         if user_id is None:
             raise credentials_exception
-    except JWTError:
+    except InvalidTokenError:
         raise credentials_exception
     
     user = await db.users.find_one({"id": user_id})
     if user is None:
         raise credentials_exception
     
-    return User(**user)
+    current_user = User(**user)
+    _user_cache[cache_key] = (current_user, payload["exp"])
+    return current_user
 
-def prepare_for_mongo(data):
-    """Prepare data for MongoDB insertion by converting dates to ISO strings"""
-    if isinstance(data, dict):
-        for key, value in data.items():
-            if isinstance(value, datetime):
-                data[key] = value.isoformat()
-    return data
+DATE_FIELDS = frozenset({'created_at', 'updated_at', 'due_date', 'timestamp', 'expires_at'})
 
 def parse_from_mongo(item):
-    """Parse data from MongoDB by converting ISO strings back to datetime objects"""
+    """Parse legacy documents that stored dates as ISO strings back to datetime objects"""
     if isinstance(item, dict):
-        for key, value in item.items():
-            if isinstance(value, str) and key in ['created_at', 'updated_at', 'due_date', 'timestamp', 'expires_at']:
+        for key in DATE_FIELDS.intersection(item):
+            value = item[key]
+            if isinstance(value, str):
                 try:
                     item[key] = datetime.fromisoformat(value.replace('Z', '+00:00'))
-                except (ValueError, AttributeError):
+                except ValueError:
                     pass
     return item
 
+# Compound index serving per-user transaction listings newest-first; hinted so
+# the planner never falls back to an in-memory sort
+TRANSACTION_TIMELINE_INDEX = [("user_id", 1), ("timestamp", -1)]
+
+async def ensure_indexes():
+    """Create indexes backing the lookups made by this module (idempotent)"""
+    await asyncio.gather(
+        db.users.create_index("id", unique=True),
+        db.users.create_index("email", unique=True),
+        db.bills.create_index([("user_id", 1), ("status", 1), ("due_date", 1)]),
+        db.bills.create_index([("id", 1), ("user_id", 1)]),
+        db.transactions.create_index(TRANSACTION_TIMELINE_INDEX),
+        db.payment_methods.create_index("user_id"),
+        db.payment_transactions.create_index([("stripe_session_id", 1), ("user_id", 1)])
+    )
+
+# Date fields that older releases stored as ISO strings, per collection
+LEGACY_DATE_FIELDS = {
+    "users": ("created_at",),
+    "bills": ("due_date", "created_at"),
+    "payment_methods": ("created_at",),
+    "transactions": ("timestamp",),
+    "payment_transactions": ("created_at", "updated_at"),
+}
+
+async def migrate_legacy_dates():
+    """Convert ISO-string dates left by older releases to BSON datetimes (idempotent)
+
+    Range filters and $min/$max compare by BSON type first, so string dates would be
+    skipped by {"$gte": datetime} and sort ahead of every real date. Unparseable
+    strings are left untouched rather than aborting the update.
+    """
+    await asyncio.gather(*(
+        db[collection].update_many(
+            {field: {"$type": "string"}},
+            [{"$set": {field: {"$convert": {"input": f"${field}", "to": "date", "onError": f"${field}"}}}}]
+        )
+        for collection, fields in LEGACY_DATE_FIELDS.items()
+        for field in fields
+    ))
+
+async def aggregate_one(collection, pipeline: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Run an aggregation expected to yield at most one document"""
+    results = await collection.aggregate(pipeline).to_list(1)
+    return results[0] if results else {}
+
 # Routes
 api_router = APIRouter(prefix="/api")
 
@@ -222,24 +325,24 @@ async def get_status():
 # Authentication routes
 @api_router.post("/auth/register", response_model=Token)
 async def register(user_create: UserCreate):
-    # Check if user exists
-    existing_user = await db.users.find_one({"email": user_create.email})
-    if existing_user:
-        raise HTTPException(status_code=400, detail="Email already registered")
-    
     # Create new user
     user_id = str(uuid.uuid4())
-    hashed_password = get_password_hash(user_create.password)
+    now = datetime.now(timezone.utc)
+    hashed_password = await run_password_hash(get_password_hash, user_create.password)
     user_data = {
         "id": user_id,
         "email": user_create.email,
         "password": hashed_password,
         "name": user_create.name,
         "phone": user_create.phone,
-        "created_at": datetime.now(timezone.utc).isoformat(),
+        "created_at": now,
     }
     
-    await db.users.insert_one(prepare_for_mongo(user_data))
+    # The unique index on users.email rejects duplicates atomically
+    try:
+        await db.users.insert_one(user_data)
+    except DuplicateKeyError:
+        raise HTTPException(status_code=400, detail="Email already registered")
     
     # Create access token
     access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
@@ -252,7 +355,7 @@ async def register(user_create: UserCreate):
         email=user_create.email,
         name=user_create.name,
         phone=user_create.phone,
-        created_at=datetime.now(timezone.utc)
+        created_at=now
     )
     
     return Token(access_token=access_token, token_type="bearer", user=user)
@@ -260,12 +363,21 @@ async def register(user_create: UserCreate):
 @api_router.post("/auth/login", response_model=Token)
 async def login(user_login: UserLogin):
     user_data = await db.users.find_one({"email": user_login.email})
-    if not user_data or not verify_password(user_login.password, user_data["password"]):
+    verified, new_hash = False, None
+    if user_data:
+        verified, new_hash = await run_password_hash(
+            verify_and_update_password, user_login.password, user_data["password"]
+        )
+    if not verified:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password"
         )
     
+    if new_hash:
+        # Upgrade legacy hash to the current scheme
+        await db.users.update_one({"id": user_data["id"]}, {"$set": {"password": new_hash}})
+    
     access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
         data={"sub": user_data["id"]}, expires_delta=access_token_expires
@@ -279,14 +391,18 @@ async def get_current_user_info(current_user: User = Depends(get_current_user)):
     return current_user
 
 @api_router.post("/auth/logout")
-async def logout():
+async def logout(credentials: Optional[HTTPAuthorizationCredentials] = Depends(optional_security)):
+    if credentials is not None:
+        cache_key = token_cache_key(credentials.credentials)
+        _user_cache.pop(cache_key, None)
+        _jwt_cache.pop(cache_key, None)
     return {"message": "Successfully logged out"}
 
 # Bills management
 @api_router.get("/bills", response_model=List[Bill])
 async def get_bills(current_user: User = Depends(get_current_user)):
     bills = await db.bills.find({"user_id": current_user.id}).to_list(1000)
-    return [Bill(**parse_from_mongo(bill)) for bill in bills]
+    return bill_list_adapter.validate_python(bills)
 
 @api_router.post("/bills", response_model=Bill)
 async def create_bill(bill_create: BillCreate, current_user: User = Depends(get_current_user)):
@@ -294,24 +410,32 @@ async def create_bill(bill_create: BillCreate, current_user: User = Depends(get_
     bill_data = {
         "id": bill_id,
         "user_id": current_user.id,
-        **bill_create.dict(),
+        **bill_create.model_dump(),
         "status": "pending",
         "created_at": datetime.now(timezone.utc),
     }
     
-    await db.bills.insert_one(prepare_for_mongo(bill_data))
-    return Bill(**parse_from_mongo(bill_data))
+    await db.bills.insert_one(bill_data)
+    return Bill(**bill_data)
 
 @api_router.put("/bills/{bill_id}", response_model=Bill)
 async def update_bill(bill_id: str, bill_update: dict, current_user: User = Depends(get_current_user)):
-    bill = await db.bills.find_one({"id": bill_id, "user_id": current_user.id})
-    if not bill:
+    # Only client-editable fields are applied; date fields sent as ISO strings are stored as datetimes
+    update_data = parse_from_mongo({
+        key: value for key, value in bill_update.items() if key in BILL_UPDATE_FIELDS
+    })
+    bill_filter = {"id": bill_id, "user_id": current_user.id}
+    if update_data:
+        updated_bill = await db.bills.find_one_and_update(
+            bill_filter,
+            {"$set": update_data},
+            return_document=ReturnDocument.AFTER
+        )
+    else:
+        updated_bill = await db.bills.find_one(bill_filter)
+    if not updated_bill:
         raise HTTPException(status_code=404, detail="Bill not found")
     
-    update_data = prepare_for_mongo(bill_update)
-    await db.bills.update_one({"id": bill_id}, {"$set": update_data})
-    
-    updated_bill = await db.bills.find_one({"id": bill_id})
     return Bill(**parse_from_mongo(updated_bill))
 
 @api_router.delete("/bills/{bill_id}")
@@ -325,7 +449,7 @@ async def delete_bill(bill_id: str, current_user: User = Depends(get_current_use
 @api_router.get("/payment-methods", response_model=List[PaymentMethod])
 async def get_payment_methods(current_user: User = Depends(get_current_user)):
     methods = await db.payment_methods.find({"user_id": current_user.id}).to_list(1000)
-    return [PaymentMethod(**parse_from_mongo(method)) for method in methods]
+    return payment_method_list_adapter.validate_python(methods)
 
 @api_router.post("/payment-methods", response_model=PaymentMethod)
 async def create_payment_method(method_create: PaymentMethodCreate, current_user: User = Depends(get_current_user)):
@@ -358,8 +482,8 @@ async def create_payment_method(method_create: PaymentMethodCreate, current_user
             {"$set": {"is_default": False}}
         )
     
-    await db.payment_methods.insert_one(prepare_for_mongo(method_data))
-    return PaymentMethod(**parse_from_mongo(method_data))
+    await db.payment_methods.insert_one(method_data)
+    return PaymentMethod(**method_data)
 
 @api_router.delete("/payment-methods/{method_id}")
 async def delete_payment_method(method_id: str, current_user: User = Depends(get_current_user)):
@@ -374,14 +498,13 @@ async def create_lightning_invoice(amount_usd: float, memo: str, current_user: U
     # Simulate Lightning Network invoice creation
     # In production, this would integrate with actual Lightning Network daemon
     
-    btc_usd_rate = 45000  # This should be fetched from a price API
-    btc_amount = amount_usd / btc_usd_rate
+    btc_amount = amount_usd / BTC_USD_RATE
     sat_amount = int(btc_amount * 100_000_000)  # Convert to satoshis
     
-    payment_hash = secrets.token_hex(32)
+    payment_hash = os.urandom(32).hex()
     
     # Generate a realistic-looking Lightning invoice
-    payment_request = f"lnbc{sat_amount}u1p{secrets.token_hex(25)}..."
+    payment_request = f"lnbc{sat_amount}u1p{os.urandom(25).hex()}..."
     
     invoice_data = {
         "payment_hash": payment_hash,
@@ -411,14 +534,16 @@ async def verify_lightning_payment(payment_hash: str, current_user: User = Depen
 @api_router.post("/payments/process", response_model=Transaction)
 async def process_payment(payment_request: PaymentRequest, current_user: User = Depends(get_current_user)):
     # Get bill and payment method
-    bill = await db.bills.find_one({"id": payment_request.bill_id, "user_id": current_user.id})
+    bill, payment_method = await asyncio.gather(
+        db.bills.find_one({"id": payment_request.bill_id, "user_id": current_user.id}),
+        db.payment_methods.find_one({
+            "id": payment_request.payment_method_id,
+            "user_id": current_user.id
+        })
+    )
     if not bill:
         raise HTTPException(status_code=404, detail="Bill not found")
     
-    payment_method = await db.payment_methods.find_one({
-        "id": payment_request.payment_method_id,
-        "user_id": current_user.id
-    })
     if not payment_method:
         raise HTTPException(status_code=404, detail="Payment method not found")
     
@@ -437,76 +562,71 @@ async def process_payment(payment_request: PaymentRequest, current_user: User =
         "timestamp": datetime.now(timezone.utc),
     }
     
-    # Update bill status
-    await db.bills.update_one(
-        {"id": payment_request.bill_id},
-        {"$set": {"status": "paid"}}
+    # Update bill status and save the transaction concurrently
+    await asyncio.gather(
+        db.bills.update_one(
+            {"id": payment_request.bill_id},
+            {"$set": {"status": "paid"}}
+        ),
+        db.transactions.insert_one(transaction_data)
     )
     
-    # Save transaction
-    await db.transactions.insert_one(prepare_for_mongo(transaction_data))
-    
-    return Transaction(**parse_from_mongo(transaction_data))
+    return Transaction(**transaction_data)
 
 @api_router.get("/payments/history", response_model=List[Transaction])
 async def get_payment_history(current_user: User = Depends(get_current_user)):
     transactions = await db.transactions.find(
         {"user_id": current_user.id}
-    ).sort("timestamp", -1).to_list(1000)
+    ).sort("timestamp", -1).hint(TRANSACTION_TIMELINE_INDEX).to_list(1000)
     
-    return [Transaction(**parse_from_mongo(transaction)) for transaction in transactions]
+    return transaction_list_adapter.validate_python(transactions)
 
 # Dashboard metrics
 @api_router.get("/dashboard/metrics", response_model=DashboardMetrics)
 async def get_dashboard_metrics(current_user: User = Depends(get_current_user)):
-    # Get pending bills
-    pending_bills = await db.bills.find({
-        "user_id": current_user.id,
-        "status": "pending"
-    }).to_list(1000)
-    
-    total_due = sum(bill["amount"] for bill in pending_bills)
-    
-    # Get next due date
-    next_due_date = None
-    if pending_bills:
-        sorted_bills = sorted(pending_bills, key=lambda x: x["due_date"])
-        next_due_date = datetime.fromisoformat(sorted_bills[0]["due_date"].replace('Z', '+00:00'))
-    
-    # Get monthly total (current month transactions)
     current_month_start = datetime.now(timezone.utc).replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-    monthly_transactions = await db.transactions.find({
-        "user_id": current_user.id,
-        "timestamp": {"$gte": current_month_start.isoformat()}
-    }).to_list(1000)
-    
-    monthly_total = sum(transaction["amount"] for transaction in monthly_transactions)
     
-    # Get payment method count
-    method_count = await db.payment_methods.count_documents({"user_id": current_user.id})
+    # Sums and the next due date are computed server-side; the four reads run concurrently
+    bill_summary, monthly_summary, method_count, recent_transactions_data = await asyncio.gather(
+        aggregate_one(db.bills, [
+            {"$match": {"user_id": current_user.id, "status": "pending"}},
+            {"$group": {"_id": None, "total_due": {"$sum": "$amount"}, "next_due_date": {"$min": "$due_date"}}}
+        ]),
+        aggregate_one(db.transactions, [
+            {"$match": {"user_id": current_user.id, "timestamp": {"$gte": current_month_start}}},
+            {"$group": {"_id": None, "monthly_total": {"$sum": "$amount"}}}
+        ]),
+        db.payment_methods.count_documents({"user_id": current_user.id}),
+        db.transactions.find(
+            {"user_id": current_user.id}
+        ).sort("timestamp", -1).hint(TRANSACTION_TIMELINE_INDEX).limit(5).to_list(5)
+    )
     
-    # Get recent transactions (last 5)
-    recent_transactions_data = await db.transactions.find(
-        {"user_id": current_user.id}
-    ).sort("timestamp", -1).limit(5).to_list(5)
+    next_due_date = bill_summary.get("next_due_date")
+    if isinstance(next_due_date, str):
+        next_due_date = datetime.fromisoformat(next_due_date.replace('Z', '+00:00'))
     
-    recent_transactions = [Transaction(**parse_from_mongo(t)) for t in recent_transactions_data]
+    recent_transactions = transaction_list_adapter.validate_python(recent_transactions_data)
     
     return DashboardMetrics(
-        total_due=total_due,
+        total_due=bill_summary.get("total_due", 0),
         next_due_date=next_due_date,
-        monthly_total=monthly_total,
+        monthly_total=monthly_summary.get("monthly_total", 0),
         method_count=method_count,
         recent_transactions=recent_transactions
     )
 
 # Enhanced Stripe Integration
-async def get_stripe_checkout(request) -> StripeCheckout:
-    """Initialize Stripe checkout with webhook URL"""
-    host_url = str(request.base_url).rstrip('/')
+@lru_cache(maxsize=4)
+def _stripe_checkout_for_host(host_url: str) -> StripeCheckout:
+    """Build one StripeCheckout client per public host and reuse it"""
     webhook_url = f"{host_url}/api/webhooks/stripe"
     return StripeCheckout(api_key=stripe_api_key, webhook_url=webhook_url)
 
+async def get_stripe_checkout(request) -> StripeCheckout:
+    """Get the Stripe checkout client for the request's host"""
+    return _stripe_checkout_for_host(str(request.base_url).rstrip('/'))
+
 @api_router.post("/payments/stripe/checkout", response_model=CheckoutSessionResponse)
 async def create_stripe_checkout(
     request: Request,
@@ -547,6 +667,7 @@ async def create_stripe_checkout(
         
         # Store payment transaction
         transaction_id = str(uuid.uuid4())
+        now = datetime.now(timezone.utc)
         payment_transaction = {
             "id": transaction_id,
             "user_id": current_user.id,
@@ -556,11 +677,11 @@ async def create_stripe_checkout(
             "payment_status": "initiated",
             "stripe_session_id": session.session_id,
             "metadata": enhanced_metadata,
-            "created_at": datetime.now(timezone.utc).isoformat(),
-            "updated_at": datetime.now(timezone.utc).isoformat()
+            "created_at": now,
+            "updated_at": now
         }
         
-        await db.payment_transactions.insert_one(prepare_for_mongo(payment_transaction))
+        await db.payment_transactions.insert_one(payment_transaction)
         
         return session
         
@@ -584,7 +705,7 @@ async def get_stripe_status(
             {
                 "$set": {
                     "payment_status": status.payment_status,
-                    "updated_at": datetime.now(timezone.utc).isoformat()
+                    "updated_at": datetime.now(timezone.utc)
                 }
             }
         )
@@ -605,24 +726,24 @@ async def stripe_webhook(request: Request):
         webhook_response = await stripe_checkout.handle_webhook(body, signature)
         
         if webhook_response.event_type == "checkout.session.completed":
-            # Update payment status and create transaction record
-            await db.payment_transactions.update_one(
+            now = datetime.now(timezone.utc)
+            
+            # Update payment status, reading back the fields needed for the history record
+            transaction_data = await db.payment_transactions.find_one_and_update(
                 {"stripe_session_id": webhook_response.session_id},
                 {
                     "$set": {
                         "payment_status": webhook_response.payment_status,
-                        "updated_at": datetime.now(timezone.utc).isoformat()
+                        "updated_at": now
                     }
-                }
+                },
+                projection={"_id": 0, "user_id": 1, "amount": 1, "payment_status": 1},
+                return_document=ReturnDocument.BEFORE
             )
             
-            # Create completed transaction for history
+            # Create completed transaction for history, once per session
             if webhook_response.payment_status == "paid":
-                transaction_data = await db.payment_transactions.find_one({
-                    "stripe_session_id": webhook_response.session_id
-                })
-                
-                if transaction_data:
+                if transaction_data and transaction_data.get("payment_status") != "paid":
                     completed_transaction = {
                         "id": str(uuid.uuid4()),
                         "user_id": transaction_data["user_id"],
@@ -631,10 +752,10 @@ async def stripe_webhook(request: Request):
                         "payment_method_id": "stripe",
                         "confirmation_number": f"STRIPE_{secrets.token_hex(6).upper()}",
                         "status": "completed",
-                        "timestamp": datetime.now(timezone.utc)
+                        "timestamp": now
                     }
                     
-                    await db.transactions.insert_one(prepare_for_mongo(completed_transaction))
+                    await db.transactions.insert_one(completed_transaction)
         
         return {"status": "success", "event_id": webhook_response.event_id}
         
@@ -644,10 +765,40 @@ async def stripe_webhook(request: Request):
 # Include router
 app.include_router(api_router)
 
+@app.on_event("startup")
+async def startup_event():
+    # register relies on the unique users.email index to reject duplicate accounts,
+    # so refuse to start rather than serve without it
+    try:
+        await ensure_indexes()
+    except Exception as e:
+        logger.error("Failed to create database indexes: %s", e)
+        raise
+    try:
+        await migrate_legacy_dates()
+    except Exception as e:
+        logger.error("Failed to migrate legacy string dates: %s", e)
+
 @app.on_event("shutdown")
 async def shutdown_db_client():
     client.close()
+    password_hash_executor.shutdown(wait=False)
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8001)
\ No newline at end of file
+    # Without JWT_SECRET each worker would sign tokens with its own random key, so a
+    # token from one worker fails on the others; stay single-process unless it is set
+    if "JWT_SECRET" in os.environ:
+        workers = int(os.environ.get("WEB_CONCURRENCY", 2 * (os.cpu_count() or 1) + 1))
+    else:
+        workers = int(os.environ.get("WEB_CONCURRENCY", 1))
+        if workers > 1:
+            raise SystemExit("JWT_SECRET must be set when running more than one worker")
+    uvicorn.run(
+        "server:app",
+        host="0.0.0.0",
+        port=8001,
+        loop="uvloop",
+        http="httptools",
+        workers=workers
+    )
\ No newline at end of file
@@ -1,117 +1,149 @@
 import asyncio
 import os
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import DeleteMany, ReplaceOne
 from passlib.context import CryptContext
 from datetime import datetime, timedelta, timezone
 import uuid
+from functools import lru_cache
 
-# Password hashing
-pwd_context = CryptContext(schemes=["pbkdf2_sha256"], deprecated="auto")
+# Password hashing - same argon2id parameters as server.py
+pwd_context = CryptContext(
+    schemes=["argon2"],
+    deprecated="auto",
+    argon2__type="ID",
+    argon2__memory_cost=19456,
+    argon2__time_cost=2,
+    argon2__parallelism=1
+)
+
+@lru_cache(maxsize=None)
+def demo_password_hash(password: str) -> str:
+    """Hash a fixed demo password once per process; repeated seeding reuses it"""
+    return pwd_context.hash(password)
+
+# Seed rows get stable ids so re-running the script replaces them in place
+DEMO_ID_NAMESPACE = uuid.uuid5(uuid.NAMESPACE_DNS, "demo.paymentus.com")
+
+def demo_id(name: str) -> str:
+    return str(uuid.uuid5(DEMO_ID_NAMESPACE, name))
+
+def reseed_operations(owner_filter: dict, docs: list) -> list:
+    """Bulk ops leaving exactly docs under owner_filter: stale rows deleted, seed rows upserted by id"""
+    seed_ids = [doc["id"] for doc in docs]
+    return [DeleteMany({**owner_filter, "id": {"$nin": seed_ids}})] + [
+        ReplaceOne({"id": doc["id"]}, doc, upsert=True) for doc in docs
+    ]
 
 # MongoDB connection
 mongo_url = os.environ.get('MONGO_URL', 'mongodb://localhost:27017')
 client = AsyncIOMotorClient(mongo_url)
 db = client[os.environ.get('DB_NAME', 'test_database')]
 
-def prepare_for_mongo(data):
-    """Prepare data for MongoDB insertion by converting dates to ISO strings"""
-    if isinstance(data, dict):
-        for key, value in data.items():
-            if isinstance(value, datetime):
-                data[key] = value.isoformat()
-    return data
+# Motor runs driver calls on a bounded thread pool (MOTOR_MAX_WORKERS); cap the
+# seed operations in flight so concurrent phases don't queue behind each other
+mongo_semaphore = asyncio.Semaphore(int(os.environ.get("MONGO_CONCURRENCY", "4")))
 
-async def setup_demo_data():
-    print("Setting up demo data...")
+async def guarded(operation):
+    """Await a Motor operation under the seed concurrency limit"""
+    async with mongo_semaphore:
+        return await operation
+
+async def _seed_users(now: datetime):
+    # Hash off the event loop so the other seed coroutines keep making progress
+    demo_hash, test_hash = await asyncio.gather(
+        asyncio.to_thread(demo_password_hash, "demo123"),
+        asyncio.to_thread(demo_password_hash, "test123")
+    )
     
     # Create demo users
     demo_users = [
         {
             "id": "demo-user-1",
             "email": "demo@paymentus.com",
-            "password": pwd_context.hash("demo123"),
+            "password": demo_hash,
             "name": "Demo User",
             "phone": "+1-555-0123",
-            "created_at": datetime.now(timezone.utc)
+            "created_at": now
         },
         {
             "id": "demo-user-2", 
             "email": "test@paymentus.com",
-            "password": pwd_context.hash("test123"),
+            "password": test_hash,
             "name": "Test User",
             "phone": "+1-555-0124",
-            "created_at": datetime.now(timezone.utc)
+            "created_at": now
         }
     ]
     
-    # Clear existing demo users and insert new ones
-    await db.users.delete_many({"email": {"$in": ["demo@paymentus.com", "test@paymentus.com"]}})
-    for user in demo_users:
-        await db.users.insert_one(prepare_for_mongo(user))
+    # Replace demo users in one round trip; the delete runs first so the unique email index can't collide
+    await guarded(db.users.bulk_write(reseed_operations(
+        {"email": {"$in": ["demo@paymentus.com", "test@paymentus.com"]}}, demo_users
+    )))
     print(f"Created {len(demo_users)} demo users")
-    
+
+async def _seed_bills(now: datetime):
     # Create demo bills for first user
     demo_bills = [
         {
-            "id": str(uuid.uuid4()),
+            "id": demo_id("bill:ACC-001234"),
             "user_id": "demo-user-1",
             "biller_name": "Spectrum Internet",
             "account_number": "ACC-001234",
             "amount": 79.99,
-            "due_date": datetime.now(timezone.utc) + timedelta(days=5),
+            "due_date": now + timedelta(days=5),
             "status": "pending",
             "bill_type": "telecom",
             "description": "Monthly internet service",
-            "created_at": datetime.now(timezone.utc)
+            "created_at": now
         },
         {
-            "id": str(uuid.uuid4()),
+            "id": demo_id("bill:ELEC-567890"),
             "user_id": "demo-user-1", 
             "biller_name": "ConEd Electric",
             "account_number": "ELEC-567890",
             "amount": 156.78,
-            "due_date": datetime.now(timezone.utc) + timedelta(days=12),
+            "due_date": now + timedelta(days=12),
             "status": "pending",
             "bill_type": "utility",
             "description": "Monthly electricity bill",
-            "created_at": datetime.now(timezone.utc)
+            "created_at": now
         },
         {
-            "id": str(uuid.uuid4()),
+            "id": demo_id("bill:INS-789012"),
             "user_id": "demo-user-1",
             "biller_name": "State Farm Insurance", 
             "account_number": "INS-789012",
             "amount": 234.50,
-            "due_date": datetime.now(timezone.utc) + timedelta(days=20),
+            "due_date": now + timedelta(days=20),
             "status": "pending",
             "bill_type": "insurance",
             "description": "Auto insurance premium",
-            "created_at": datetime.now(timezone.utc)
+            "created_at": now
         },
         {
-            "id": str(uuid.uuid4()),
+            "id": demo_id("bill:PARK-345678"),
             "user_id": "demo-user-1",
             "biller_name": "NYC Parking Authority",
             "account_number": "PARK-345678",
             "amount": 45.00,
-            "due_date": datetime.now(timezone.utc) - timedelta(days=2),
+            "due_date": now - timedelta(days=2),
             "status": "overdue",
             "bill_type": "government",
             "description": "Parking ticket fine",
-            "created_at": datetime.now(timezone.utc)
+            "created_at": now
         }
     ]
     
-    # Clear existing demo bills and insert new ones
-    await db.bills.delete_many({"user_id": "demo-user-1"})
-    for bill in demo_bills:
-        await db.bills.insert_one(prepare_for_mongo(bill))
+    # Replace demo bills in one round trip
+    await guarded(db.bills.bulk_write(reseed_operations({"user_id": "demo-user-1"}, demo_bills)))
     print(f"Created {len(demo_bills)} demo bills")
-    
+
+async def _seed_payment_methods(now: datetime):
     # Create demo payment methods for first user
     demo_payment_methods = [
         {
-            "id": str(uuid.uuid4()),
+            "id": demo_id("payment-method:credit_card"),
             "user_id": "demo-user-1",
             "type": "credit_card",
             "last4": "4567",
@@ -122,10 +154,10 @@ async def setup_demo_data():
             "account_type": None,
             "bitcoin_address": None,
             "is_default": True,
-            "created_at": datetime.now(timezone.utc)
+            "created_at": now
         },
         {
-            "id": str(uuid.uuid4()),
+            "id": demo_id("payment-method:bank_account"),
             "user_id": "demo-user-1",
             "type": "bank_account",
             "last4": "8901",
@@ -136,10 +168,10 @@ async def setup_demo_data():
             "account_type": "checking",
             "bitcoin_address": None,
             "is_default": False,
-            "created_at": datetime.now(timezone.utc)
+            "created_at": now
         },
         {
-            "id": str(uuid.uuid4()),
+            "id": demo_id("payment-method:bitcoin"),
             "user_id": "demo-user-1",
             "type": "bitcoin",
             "last4": None,
@@ -150,45 +182,56 @@ async def setup_demo_data():
             "account_type": None,
             "bitcoin_address": "bc1q4y49r0x3v8kevysagjkjfesxgfnfqjd2rp0c90",
             "is_default": False,
-            "created_at": datetime.now(timezone.utc)
+            "created_at": now
         }
     ]
     
-    # Clear existing demo payment methods and insert new ones
-    await db.payment_methods.delete_many({"user_id": "demo-user-1"})
-    for method in demo_payment_methods:
-        await db.payment_methods.insert_one(prepare_for_mongo(method))
+    # Replace demo payment methods in one round trip
+    await guarded(db.payment_methods.bulk_write(reseed_operations({"user_id": "demo-user-1"}, demo_payment_methods)))
     print(f"Created {len(demo_payment_methods)} demo payment methods")
-    
+    return demo_payment_methods
+
+async def _seed_transactions(payment_methods, now: datetime):
     # Create some demo transactions
     demo_transactions = [
         {
-            "id": str(uuid.uuid4()),
+            "id": demo_id("transaction:PAY1A2B3C"),
             "user_id": "demo-user-1",
             "bill_id": "dummy-bill-1",
             "amount": 89.99,
-            "payment_method_id": demo_payment_methods[0]["id"],
+            "payment_method_id": payment_methods[0]["id"],
             "confirmation_number": "PAY1A2B3C",
             "status": "completed",
-            "timestamp": datetime.now(timezone.utc) - timedelta(days=5)
+            "timestamp": now - timedelta(days=5)
         },
         {
-            "id": str(uuid.uuid4()),
+            "id": demo_id("transaction:PAY4D5E6F"),
             "user_id": "demo-user-1", 
             "bill_id": "dummy-bill-2",
             "amount": 125.50,
-            "payment_method_id": demo_payment_methods[1]["id"],
+            "payment_method_id": payment_methods[1]["id"],
             "confirmation_number": "PAY4D5E6F",
             "status": "completed",
-            "timestamp": datetime.now(timezone.utc) - timedelta(days=12)
+            "timestamp": now - timedelta(days=12)
         }
     ]
     
-    # Clear existing demo transactions and insert new ones
-    await db.transactions.delete_many({"user_id": "demo-user-1"})
-    for txn in demo_transactions:
-        await db.transactions.insert_one(prepare_for_mongo(txn))
+    # Replace demo transactions in one round trip
+    await guarded(db.transactions.bulk_write(reseed_operations({"user_id": "demo-user-1"}, demo_transactions)))
     print(f"Created {len(demo_transactions)} demo transactions")
+
+async def setup_demo_data():
+    print("Setting up demo data...")
+    # One reference time for every seeded row, so created_at values line up
+    now = datetime.now(timezone.utc)
+    
+    # Users, bills and payment methods are independent; transactions reference the payment methods
+    _, _, payment_methods = await asyncio.gather(
+        _seed_users(now),
+        _seed_bills(now),
+        _seed_payment_methods(now)
+    )
+    await _seed_transactions(payment_methods, now)
     
     print("Demo data setup complete!")
 
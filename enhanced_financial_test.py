@@ -5,74 +5,298 @@ Tests advanced financial services, compliance, and security features
 """
 
 import requests
-import json
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+import hashlib
+import io
+import orjson
+import os
+import sys
 import time
-from datetime import datetime, timedelta, timezone
-from typing import Dict, Any, Optional
+import uuid
+from operator import itemgetter
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Any, NamedTuple, Optional, Union
 
 # Configuration
 BASE_URL = "https://payment-dashboard-24.preview.emergentagent.com/api"
 TIMEOUT = 30
+# Result buckets, in summary order
+RESULT_CATEGORIES = (
+    "stripe_integration",
+    "security_framework",
+    "compliance_systems",
+    "banking_integration",
+    "financial_infrastructure",
+    "production_features"
+)
+BANNER = "=" * 70
+RULE = "-" * 70
+SUMMARY_ROW = "{:25} | {} | {} passed, {} failed"
+MISSING_FEATURES = (
+    "AML Risk Assessment System",
+    "KYC Document Upload & Verification",
+    "OFAC Sanctions Screening",
+    "Multi-Signature Wallet Management",
+    "Plaid Banking Integration",
+    "ACH Processing Templates",
+    "Bank Account Verification",
+    "Compliance Monitoring System",
+    "Audit Trail Management",
+    "Regulatory Reporting",
+    "Advanced Risk Scoring",
+    "Security Encryption/Decryption APIs",
+    "Enhanced Transaction Processing with Compliance",
+    "Production Monitoring & Metrics"
+)
+# Opt-in: skip fixed endpoints that were unrouted (404) at this BASE_URL within the last day (local dev loops only;
+# CI should leave it unset so newly implemented endpoints are noticed immediately)
+SKIP_KNOWN_MISSING = bool(os.environ.get("SKIP_KNOWN_MISSING"))
+KNOWN_MISSING_PATH = Path.home() / ".cache" / "paymentus_probe_neg.json"
+KNOWN_MISSING_TTL = 86400
+# Opt-in: reuse a previously registered test account (token checked against /auth/me) instead of
+# registering a fresh one; the cache file is keyed by a fingerprint of the target and registration profile
+REUSE_TEST_ACCOUNT = bool(os.environ.get("REUSE_TEST_ACCOUNT"))
+TEST_ACCOUNT_PROFILE = {
+    "password": "SecureFinancial123!",
+    "name": "Financial Test User",
+    "phone": "+1-555-0199"
+}
+TEST_ACCOUNT_CACHE_PATH = Path.home() / ".cache" / "paymentus_auth" / (
+    hashlib.sha256(orjson.dumps({"schema": "v1", "base_url": BASE_URL, **TEST_ACCOUNT_PROFILE}, option=orjson.OPT_SORT_KEYS)).hexdigest()[:32]
+    + ".json"
+)
+TEST_ACCOUNT_TTL = 12 * 3600
+# Static webhook probe body, encoded once
+WEBHOOK_PROBE_BODY = orjson.dumps({"test": "webhook"})
+
+def json_body(response: requests.Response) -> Any:
+    """Decode a JSON response body with orjson"""
+    return orjson.loads(response.content)
+
+class Probe(NamedTuple):
+    """A single independent request and what a passing response must contain"""
+    category: str
+    name: str
+    method: str
+    endpoint: str
+    payload: Optional[Callable[[str], Dict]] = None  # built from the current user id
+    require: Optional[Callable[[Any], Any]] = None  # itemgetter over the keys a passing body must carry
+    missing_error: Optional[str] = None
+    unavailable_error: Optional[str] = None  # reported instead of the HTTP error when set
+
+# Independent probes, grouped by category; each category is issued as one concurrent batch.
+# Chained flows (Stripe checkout -> status) and fallbacks stay in their test methods.
+PROBES = (
+    Probe("security_framework", "Security Endpoint /security/encrypt", "GET", "/security/encrypt",
+          unavailable_error="Endpoint not implemented"),
+    Probe("security_framework", "Security Endpoint /security/decrypt", "GET", "/security/decrypt",
+          unavailable_error="Endpoint not implemented"),
+    Probe("security_framework", "Security Endpoint /security/keys/rotate", "GET", "/security/keys/rotate",
+          unavailable_error="Endpoint not implemented"),
+    Probe("security_framework", "Security Endpoint /security/digital-sign", "GET", "/security/digital-sign",
+          unavailable_error="Endpoint not implemented"),
+    
+    Probe("financial_infrastructure", "AML Risk Assessment", "POST", "/compliance/aml/assess",
+          payload=lambda user_id: {
+              "transaction_amount": 5000.00,
+              "customer_id": user_id,
+              "transaction_type": "bill_payment"
+          },
+          require=itemgetter("risk_score"), missing_error="Missing risk score",
+          unavailable_error="AML endpoint not implemented"),
+    Probe("financial_infrastructure", "KYC Document Upload", "POST", "/compliance/kyc/upload",
+          payload=lambda user_id: {
+              "document_type": "drivers_license",
+              "document_data": "base64_encoded_document_data"
+          },
+          unavailable_error="KYC endpoint not implemented"),
+    Probe("financial_infrastructure", "OFAC Sanctions Screening", "POST", "/compliance/ofac/screen",
+          payload=lambda user_id: {
+              "customer_name": "John Doe",
+              "customer_id": user_id
+          },
+          require=itemgetter("screening_result"), missing_error="Missing screening result",
+          unavailable_error="OFAC endpoint not implemented"),
+    Probe("financial_infrastructure", "Multi-Signature Wallet Creation", "POST", "/wallets/multisig/create",
+          payload=lambda user_id: {
+              "required_signatures": 2,
+              "total_signers": 3,
+              "signer_public_keys": ["key1", "key2", "key3"]
+          },
+          require=itemgetter("wallet_address"), missing_error="Missing wallet address",
+          unavailable_error="Multi-sig endpoint not implemented"),
+    
+    Probe("banking_integration", "Plaid Account Linking", "POST", "/banking/plaid/link",
+          payload=lambda user_id: {
+              "public_token": "public-sandbox-test-token",
+              "account_id": "test_account_id"
+          },
+          require=itemgetter("access_token"), missing_error="Missing access token",
+          unavailable_error="Plaid endpoint not implemented"),
+    Probe("banking_integration", "ACH Processing Simulation", "POST", "/banking/ach/process",
+          payload=lambda user_id: {
+              "account_id": "test_account",
+              "amount": 100.00,
+              "transaction_type": "debit"
+          },
+          require=itemgetter("transaction_id"), missing_error="Missing transaction ID",
+          unavailable_error="ACH endpoint not implemented"),
+    Probe("banking_integration", "Bank Account Verification", "POST", "/banking/verify",
+          payload=lambda user_id: {
+              "account_number": "123456789",
+              "routing_number": "021000021",
+              "account_type": "checking"
+          },
+          require=itemgetter("verification_status"), missing_error="Missing verification status",
+          unavailable_error="Bank verification endpoint not implemented"),
+    
+    Probe("compliance_systems", "Compliance Monitoring", "GET", "/compliance/monitoring/status",
+          require=itemgetter("monitoring_active"), missing_error="Missing monitoring status",
+          unavailable_error="Compliance monitoring not implemented"),
+    Probe("compliance_systems", "Audit Trail Creation", "POST", "/audit/log",
+          payload=lambda user_id: {
+              "action": "payment_processed",
+              "user_id": user_id,
+              "transaction_id": "test_transaction",
+              "metadata": {"amount": 100.00}
+          },
+          unavailable_error="Audit logging not implemented"),
+    Probe("compliance_systems", "Regulatory Reporting", "GET", "/compliance/reports/generate",
+          require=itemgetter("report_id"), missing_error="Missing report ID",
+          unavailable_error="Regulatory reporting not implemented"),
+    Probe("compliance_systems", "Risk Scoring", "POST", "/compliance/risk/score",
+          payload=lambda user_id: {
+              "transaction_amount": 1000.00,
+              "customer_profile": "standard",
+              "transaction_frequency": "normal"
+          },
+          require=itemgetter("risk_score"), missing_error="Missing risk score",
+          unavailable_error="Risk scoring not implemented"),
+    
+    Probe("production_features", "Health Check Endpoint", "GET", "/status"),
+    Probe("production_features", "Metrics Endpoint", "GET", "/metrics",
+          unavailable_error="Metrics endpoint not implemented"),
+    Probe("production_features", "Background Task Status", "GET", "/tasks/status",
+          require=itemgetter("active_tasks"), missing_error="Missing task status",
+          unavailable_error="Task status endpoint not implemented"),
+    Probe("production_features", "Database Health Check", "GET", "/database/health",
+          require=itemgetter("connection_status"), missing_error="Missing connection status",
+          unavailable_error="Database health endpoint not implemented"),
+)
+
+# Full URLs for every fixed endpoint, joined once at import; parameterized paths are joined per call
+ENDPOINT_URLS = {
+    endpoint: BASE_URL + endpoint
+    for endpoint in (
+        "/auth/register",
+        "/auth/me",
+        "/payments/stripe/checkout",
+        "/webhooks/stripe",
+        "/payments/enhanced/process",
+        "/payments/enhanced/history",
+        "/payments/history",
+        *(probe.endpoint for probe in PROBES)
+    )
+}
 
 class EnhancedFinancialTester:
     def __init__(self):
         self.session = requests.Session()
-        self.session.timeout = TIMEOUT
+        # One pooled keep-alive adapter for every call; idempotent requests retry on gateway errors
+        adapter = HTTPAdapter(
+            pool_connections=4,
+            pool_maxsize=32,
+            max_retries=Retry(total=2, backoff_factor=0.2, status_forcelist=[502, 503, 504], raise_on_status=False)
+        )
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers.update({"Content-Type": "application/json"})
         self.auth_token = None
         self.user_data = None
-        self.test_results = {
-            "stripe_integration": {"passed": 0, "failed": 0, "errors": []},
-            "security_framework": {"passed": 0, "failed": 0, "errors": []},
-            "compliance_systems": {"passed": 0, "failed": 0, "errors": []},
-            "banking_integration": {"passed": 0, "failed": 0, "errors": []},
-            "financial_infrastructure": {"passed": 0, "failed": 0, "errors": []},
-            "production_features": {"passed": 0, "failed": 0, "errors": []}
-        }
-        
+        self.test_results = {category: {"passed": 0, "failed": 0, "errors": []} for category in RESULT_CATEGORIES}
+        # Progress lines are buffered and written once per suite
+        self._log = io.StringIO()
+        # "METHOD <full URL>" -> time a fixed endpoint last returned 404; None when the cache is disabled
+        self.known_missing = self.load_known_missing() if SKIP_KNOWN_MISSING else None
+        
+    def load_known_missing(self) -> Dict[str, float]:
+        """Load unexpired 404 entries from the on-disk negative cache"""
+        try:
+            entries = orjson.loads(KNOWN_MISSING_PATH.read_bytes())
+        except (OSError, orjson.JSONDecodeError):
+            return {}
+        cutoff = time.time() - KNOWN_MISSING_TTL
+        return {probe: seen_at for probe, seen_at in entries.items() if seen_at > cutoff}
+    
+    def save_known_missing(self):
+        if self.known_missing is None:
+            return
+        KNOWN_MISSING_PATH.parent.mkdir(parents=True, exist_ok=True)
+        KNOWN_MISSING_PATH.write_bytes(orjson.dumps(self.known_missing))
+    
+    def _out(self, line: str):
+        self._log.write(line + "\n")
+    
+    def flush_output(self):
+        """Write buffered progress lines to stdout in one call"""
+        sys.stdout.write(self._log.getvalue())
+        sys.stdout.flush()
+        self._log = io.StringIO()
+    
     def log_result(self, category: str, test_name: str, success: bool, error: str = None):
         """Log test result"""
+        results = self.test_results[category]
         if success:
-            self.test_results[category]["passed"] += 1
-            print(f"✅ {test_name}")
+            results["passed"] += 1
+            self._out(f"✅ {test_name}")
         else:
-            self.test_results[category]["failed"] += 1
-            self.test_results[category]["errors"].append(f"{test_name}: {error}")
-            print(f"❌ {test_name}: {error}")
+            results["failed"] += 1
+            results["errors"].append((test_name, error))
+            self._out(f"❌ {test_name}: {error}")
     
-    def make_request(self, method: str, endpoint: str, data: Dict = None, headers: Dict = None) -> tuple:
-        """Make HTTP request and return (success, response, error)"""
+    def make_request(self, method: str, endpoint: str, data: Union[Dict, bytes] = None, headers: Dict = None) -> tuple:
+        """Make HTTP request and return (success, response, error); data may be pre-serialized JSON bytes"""
+        # Only fixed endpoints go through the negative cache; parameterized paths (e.g. a
+        # session's status) name per-run resources whose 404 says nothing about the next run
+        static_url = ENDPOINT_URLS.get(endpoint)
+        probe_key = f"{method.upper()} {static_url}" if static_url and self.known_missing is not None else None
+        if probe_key is not None and probe_key in self.known_missing:
+            return False, None, "HTTP 404: cached negative result"
+        
         try:
-            url = f"{BASE_URL}{endpoint}"
-            request_headers = {"Content-Type": "application/json"}
-            
-            if self.auth_token:
-                request_headers["Authorization"] = f"Bearer {self.auth_token}"
-            
-            if headers:
-                request_headers.update(headers)
+            url = static_url or BASE_URL + endpoint
+            # Content-Type and Authorization are session defaults; requests merges any per-call headers
+            body = data if data is None or isinstance(data, bytes) else orjson.dumps(data)
             
-            print(f"Making {method} request to: {url}")
+            self._out(f"Making {method} request to: {url}")
             
             if method.upper() == "GET":
-                response = self.session.get(url, headers=request_headers)
+                response = self.session.get(url, headers=headers, timeout=TIMEOUT)
             elif method.upper() == "POST":
-                response = self.session.post(url, json=data, headers=request_headers)
+                response = self.session.post(url, data=body, headers=headers, timeout=TIMEOUT)
             elif method.upper() == "PUT":
-                response = self.session.put(url, json=data, headers=request_headers)
+                response = self.session.put(url, data=body, headers=headers, timeout=TIMEOUT)
             elif method.upper() == "DELETE":
-                response = self.session.delete(url, headers=request_headers)
+                response = self.session.delete(url, headers=headers, timeout=TIMEOUT)
             else:
                 return False, None, f"Unsupported method: {method}"
             
-            print(f"Response status: {response.status_code}")
+            self._out(f"Response status: {response.status_code}")
             
             if response.status_code >= 400:
                 error_msg = f"HTTP {response.status_code}"
+                error_detail = None
                 try:
-                    error_detail = response.json().get("detail", "Unknown error")
+                    error_detail = json_body(response).get("detail", "Unknown error")
                     error_msg += f": {error_detail}"
                 except:
-                    error_msg += f": {response.text[:200]}"
+                    # Decode only the bytes shown; response.text would decode (and charset-sniff) the whole page
+                    error_msg += f": {response.content[:200].decode('utf-8', 'replace')}"
+                # Remember only unrouted paths (FastAPI's bare "Not Found"), not a handler's missing resource
+                if response.status_code == 404 and error_detail == "Not Found" and probe_key is not None:
+                    self.known_missing[probe_key] = time.time()
                 return False, response, error_msg
             
             return True, response, None
@@ -84,33 +308,90 @@ class EnhancedFinancialTester:
         except Exception as e:
             return False, None, f"Request failed: {str(e)}"
     
+    def make_requests(self, *calls: tuple) -> list:
+        """Issue independent (method, endpoint[, data]) requests concurrently; results keep call order"""
+        with ThreadPoolExecutor(max_workers=len(calls)) as executor:
+            return list(executor.map(lambda call: self.make_request(*call), calls))
+    
+    def run_probes(self, category: str):
+        """Issue a category's table-driven probes concurrently and log each against its expectations"""
+        probes = [probe for probe in PROBES if probe.category == category]
+        user_id = self.user_data["id"] if self.user_data else "test"
+        results = self.make_requests(*(
+            (probe.method, probe.endpoint, probe.payload(user_id) if probe.payload else None)
+            for probe in probes
+        ))
+        for probe, (success, response, error) in zip(probes, results):
+            if not success:
+                self.log_result(category, probe.name, False, probe.unavailable_error or error)
+                continue
+            try:
+                if probe.require:
+                    probe.require(json_body(response))
+            except (KeyError, TypeError, IndexError):
+                self.log_result(category, probe.name, False, probe.missing_error)
+            else:
+                self.log_result(category, probe.name, True)
+    
+    def reuse_cached_account(self) -> bool:
+        """Adopt the cached test account if it is fresh and its token is still accepted"""
+        try:
+            cached = orjson.loads(TEST_ACCOUNT_CACHE_PATH.read_bytes())
+        except (OSError, orjson.JSONDecodeError):
+            return False
+        if not isinstance(cached, dict) or time.time() - cached.get("ts", 0) > TEST_ACCOUNT_TTL:
+            return False
+        access_token = cached.get("access_token")
+        user = cached.get("user")
+        if not access_token or user is None:
+            return False
+        
+        self.session.headers["Authorization"] = f"Bearer {access_token}"
+        success, response, error = self.make_request("GET", "/auth/me")
+        if not success:
+            del self.session.headers["Authorization"]
+            return False
+        self.auth_token = access_token
+        self.user_data = user
+        return True
+    
     def setup_authentication(self):
         """Setup authentication for testing"""
-        print("\n🔐 Setting up authentication...")
+        self._out("\n🔐 Setting up authentication...")
         
-        # Register a test user
-        unique_email = f"financial.test.{int(time.time())}@example.com"
-        register_data = {
-            "email": unique_email,
-            "password": "SecureFinancial123!",
-            "name": "Financial Test User",
-            "phone": "+1-555-0199"
-        }
+        if REUSE_TEST_ACCOUNT and self.reuse_cached_account():
+            self._out("✅ Authentication setup complete (reused cached test account)")
+            return True
+        
+        # Register a test user; a random UUID never repeats an address already in a persistent test DB
+        unique_email = f"financial.test.{uuid.uuid4().hex}@example.com"
+        register_data = {"email": unique_email, **TEST_ACCOUNT_PROFILE}
         
         success, response, error = self.make_request("POST", "/auth/register", register_data)
         if success:
-            data = response.json()
+            data = json_body(response)
             self.auth_token = data["access_token"]
+            self.session.headers["Authorization"] = f"Bearer {self.auth_token}"
             self.user_data = data["user"]
-            print("✅ Authentication setup complete")
+            if REUSE_TEST_ACCOUNT:
+                TEST_ACCOUNT_CACHE_PATH.parent.mkdir(parents=True, exist_ok=True)
+                # The cache holds a bearer token: create it owner-only rather than with the default umask
+                fd = os.open(TEST_ACCOUNT_CACHE_PATH, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+                with os.fdopen(fd, 'wb') as f:
+                    f.write(orjson.dumps({
+                        "access_token": self.auth_token,
+                        "user": self.user_data,
+                        "ts": time.time()
+                    }))
+            self._out("✅ Authentication setup complete")
             return True
         else:
-            print(f"❌ Authentication setup failed: {error}")
+            self._out(f"❌ Authentication setup failed: {error}")
             return False
     
     def test_enhanced_stripe_integration(self):
         """Test enhanced Stripe integration with emergentintegrations"""
-        print("\n💳 Testing Enhanced Stripe Integration...")
+        self._out("\n💳 Testing Enhanced Stripe Integration...")
         
         if not self.auth_token:
             self.log_result("stripe_integration", "Stripe Integration", False, "No authentication token")
@@ -128,9 +409,15 @@ class EnhancedFinancialTester:
             }
         }
         
-        success, response, error = self.make_request("POST", "/payments/stripe/checkout", checkout_data)
+        # Checkout creation and the webhook probe are independent; only the status poll waits on checkout
+        checkout_result, webhook_result = self.make_requests(
+            ("POST", "/payments/stripe/checkout", checkout_data),
+            ("POST", "/webhooks/stripe", WEBHOOK_PROBE_BODY)
+        )
+        
+        success, response, error = checkout_result
         if success:
-            data = response.json()
+            data = json_body(response)
             if data.get("session_id") and data.get("checkout_url"):
                 session_id = data["session_id"]
                 self.log_result("stripe_integration", "Create Stripe Checkout Session", True)
@@ -138,7 +425,7 @@ class EnhancedFinancialTester:
                 # Test payment status polling
                 success, response, error = self.make_request("GET", f"/payments/stripe/status/{session_id}")
                 if success:
-                    status_data = response.json()
+                    status_data = json_body(response)
                     if "payment_status" in status_data:
                         self.log_result("stripe_integration", "Stripe Payment Status Polling", True)
                     else:
@@ -151,7 +438,7 @@ class EnhancedFinancialTester:
             self.log_result("stripe_integration", "Create Stripe Checkout Session", False, error)
         
         # Test webhook endpoint exists
-        success, response, error = self.make_request("POST", "/webhooks/stripe", {"test": "webhook"})
+        success, response, error = webhook_result
         # Webhook should return 400 for invalid data, not 404
         if not success and "400" in str(error):
             self.log_result("stripe_integration", "Stripe Webhook Endpoint", True)
@@ -162,246 +449,37 @@ class EnhancedFinancialTester:
     
     def test_security_framework(self):
         """Test security framework validation"""
-        print("\n🔒 Testing Security Framework...")
+        self._out("\n🔒 Testing Security Framework...")
         
         # Test JWT authentication (already covered in basic tests)
         self.log_result("security_framework", "JWT Authentication", True, "Covered in basic authentication tests")
         
         # Test for encryption endpoints (these would be missing in current implementation)
-        security_endpoints = [
-            "/security/encrypt",
-            "/security/decrypt", 
-            "/security/keys/rotate",
-            "/security/digital-sign"
-        ]
-        
-        for endpoint in security_endpoints:
-            success, response, error = self.make_request("GET", endpoint)
-            if success:
-                self.log_result("security_framework", f"Security Endpoint {endpoint}", True)
-            else:
-                self.log_result("security_framework", f"Security Endpoint {endpoint}", False, "Endpoint not implemented")
+        self.run_probes("security_framework")
     
     def test_financial_infrastructure(self):
         """Test financial infrastructure components"""
-        print("\n🏦 Testing Financial Infrastructure...")
-        
-        # Test AML risk assessment
-        aml_data = {
-            "transaction_amount": 5000.00,
-            "customer_id": self.user_data["id"] if self.user_data else "test",
-            "transaction_type": "bill_payment"
-        }
-        
-        success, response, error = self.make_request("POST", "/compliance/aml/assess", aml_data)
-        if success:
-            data = response.json()
-            if "risk_score" in data:
-                self.log_result("financial_infrastructure", "AML Risk Assessment", True)
-            else:
-                self.log_result("financial_infrastructure", "AML Risk Assessment", False, "Missing risk score")
-        else:
-            self.log_result("financial_infrastructure", "AML Risk Assessment", False, "AML endpoint not implemented")
-        
-        # Test KYC document upload
-        kyc_data = {
-            "document_type": "drivers_license",
-            "document_data": "base64_encoded_document_data"
-        }
-        
-        success, response, error = self.make_request("POST", "/compliance/kyc/upload", kyc_data)
-        if success:
-            self.log_result("financial_infrastructure", "KYC Document Upload", True)
-        else:
-            self.log_result("financial_infrastructure", "KYC Document Upload", False, "KYC endpoint not implemented")
-        
-        # Test OFAC sanctions screening
-        ofac_data = {
-            "customer_name": "John Doe",
-            "customer_id": self.user_data["id"] if self.user_data else "test"
-        }
-        
-        success, response, error = self.make_request("POST", "/compliance/ofac/screen", ofac_data)
-        if success:
-            data = response.json()
-            if "screening_result" in data:
-                self.log_result("financial_infrastructure", "OFAC Sanctions Screening", True)
-            else:
-                self.log_result("financial_infrastructure", "OFAC Sanctions Screening", False, "Missing screening result")
-        else:
-            self.log_result("financial_infrastructure", "OFAC Sanctions Screening", False, "OFAC endpoint not implemented")
-        
-        # Test multi-signature wallet creation
-        multisig_data = {
-            "required_signatures": 2,
-            "total_signers": 3,
-            "signer_public_keys": ["key1", "key2", "key3"]
-        }
-        
-        success, response, error = self.make_request("POST", "/wallets/multisig/create", multisig_data)
-        if success:
-            data = response.json()
-            if "wallet_address" in data:
-                self.log_result("financial_infrastructure", "Multi-Signature Wallet Creation", True)
-            else:
-                self.log_result("financial_infrastructure", "Multi-Signature Wallet Creation", False, "Missing wallet address")
-        else:
-            self.log_result("financial_infrastructure", "Multi-Signature Wallet Creation", False, "Multi-sig endpoint not implemented")
+        self._out("\n🏦 Testing Financial Infrastructure...")
+        self.run_probes("financial_infrastructure")
     
     def test_banking_integration(self):
         """Test banking integration templates"""
-        print("\n🏛️ Testing Banking Integration...")
-        
-        # Test Plaid integration
-        plaid_data = {
-            "public_token": "public-sandbox-test-token",
-            "account_id": "test_account_id"
-        }
-        
-        success, response, error = self.make_request("POST", "/banking/plaid/link", plaid_data)
-        if success:
-            data = response.json()
-            if "access_token" in data:
-                self.log_result("banking_integration", "Plaid Account Linking", True)
-            else:
-                self.log_result("banking_integration", "Plaid Account Linking", False, "Missing access token")
-        else:
-            self.log_result("banking_integration", "Plaid Account Linking", False, "Plaid endpoint not implemented")
-        
-        # Test ACH processing simulation
-        ach_data = {
-            "account_id": "test_account",
-            "amount": 100.00,
-            "transaction_type": "debit"
-        }
-        
-        success, response, error = self.make_request("POST", "/banking/ach/process", ach_data)
-        if success:
-            data = response.json()
-            if "transaction_id" in data:
-                self.log_result("banking_integration", "ACH Processing Simulation", True)
-            else:
-                self.log_result("banking_integration", "ACH Processing Simulation", False, "Missing transaction ID")
-        else:
-            self.log_result("banking_integration", "ACH Processing Simulation", False, "ACH endpoint not implemented")
-        
-        # Test bank account verification
-        verification_data = {
-            "account_number": "123456789",
-            "routing_number": "021000021",
-            "account_type": "checking"
-        }
-        
-        success, response, error = self.make_request("POST", "/banking/verify", verification_data)
-        if success:
-            data = response.json()
-            if "verification_status" in data:
-                self.log_result("banking_integration", "Bank Account Verification", True)
-            else:
-                self.log_result("banking_integration", "Bank Account Verification", False, "Missing verification status")
-        else:
-            self.log_result("banking_integration", "Bank Account Verification", False, "Bank verification endpoint not implemented")
+        self._out("\n🏛️ Testing Banking Integration...")
+        self.run_probes("banking_integration")
     
     def test_compliance_systems(self):
         """Test compliance and audit systems"""
-        print("\n📋 Testing Compliance Systems...")
-        
-        # Test compliance monitoring
-        success, response, error = self.make_request("GET", "/compliance/monitoring/status")
-        if success:
-            data = response.json()
-            if "monitoring_active" in data:
-                self.log_result("compliance_systems", "Compliance Monitoring", True)
-            else:
-                self.log_result("compliance_systems", "Compliance Monitoring", False, "Missing monitoring status")
-        else:
-            self.log_result("compliance_systems", "Compliance Monitoring", False, "Compliance monitoring not implemented")
-        
-        # Test audit trail creation
-        audit_data = {
-            "action": "payment_processed",
-            "user_id": self.user_data["id"] if self.user_data else "test",
-            "transaction_id": "test_transaction",
-            "metadata": {"amount": 100.00}
-        }
-        
-        success, response, error = self.make_request("POST", "/audit/log", audit_data)
-        if success:
-            self.log_result("compliance_systems", "Audit Trail Creation", True)
-        else:
-            self.log_result("compliance_systems", "Audit Trail Creation", False, "Audit logging not implemented")
-        
-        # Test regulatory reporting
-        success, response, error = self.make_request("GET", "/compliance/reports/generate")
-        if success:
-            data = response.json()
-            if "report_id" in data:
-                self.log_result("compliance_systems", "Regulatory Reporting", True)
-            else:
-                self.log_result("compliance_systems", "Regulatory Reporting", False, "Missing report ID")
-        else:
-            self.log_result("compliance_systems", "Regulatory Reporting", False, "Regulatory reporting not implemented")
-        
-        # Test risk scoring
-        risk_data = {
-            "transaction_amount": 1000.00,
-            "customer_profile": "standard",
-            "transaction_frequency": "normal"
-        }
-        
-        success, response, error = self.make_request("POST", "/compliance/risk/score", risk_data)
-        if success:
-            data = response.json()
-            if "risk_score" in data:
-                self.log_result("compliance_systems", "Risk Scoring", True)
-            else:
-                self.log_result("compliance_systems", "Risk Scoring", False, "Missing risk score")
-        else:
-            self.log_result("compliance_systems", "Risk Scoring", False, "Risk scoring not implemented")
+        self._out("\n📋 Testing Compliance Systems...")
+        self.run_probes("compliance_systems")
     
     def test_production_features(self):
         """Test production deployment features"""
-        print("\n🚀 Testing Production Features...")
-        
-        # Test health check endpoints (already covered)
-        success, response, error = self.make_request("GET", "/status")
-        if success:
-            self.log_result("production_features", "Health Check Endpoint", True)
-        else:
-            self.log_result("production_features", "Health Check Endpoint", False, error)
-        
-        # Test metrics endpoint
-        success, response, error = self.make_request("GET", "/metrics")
-        if success:
-            self.log_result("production_features", "Metrics Endpoint", True)
-        else:
-            self.log_result("production_features", "Metrics Endpoint", False, "Metrics endpoint not implemented")
-        
-        # Test background task status
-        success, response, error = self.make_request("GET", "/tasks/status")
-        if success:
-            data = response.json()
-            if "active_tasks" in data:
-                self.log_result("production_features", "Background Task Status", True)
-            else:
-                self.log_result("production_features", "Background Task Status", False, "Missing task status")
-        else:
-            self.log_result("production_features", "Background Task Status", False, "Task status endpoint not implemented")
-        
-        # Test database transaction integrity
-        success, response, error = self.make_request("GET", "/database/health")
-        if success:
-            data = response.json()
-            if "connection_status" in data:
-                self.log_result("production_features", "Database Health Check", True)
-            else:
-                self.log_result("production_features", "Database Health Check", False, "Missing connection status")
-        else:
-            self.log_result("production_features", "Database Health Check", False, "Database health endpoint not implemented")
+        self._out("\n🚀 Testing Production Features...")
+        self.run_probes("production_features")
     
     def test_enhanced_transaction_processing(self):
         """Test enhanced transaction processing with compliance"""
-        print("\n💰 Testing Enhanced Transaction Processing...")
+        self._out("\n💰 Testing Enhanced Transaction Processing...")
         
         if not self.auth_token:
             self.log_result("financial_infrastructure", "Enhanced Transaction Processing", False, "No authentication token")
@@ -421,7 +499,7 @@ class EnhancedFinancialTester:
         
         success, response, error = self.make_request("POST", "/payments/enhanced/process", enhanced_payment_data)
         if success:
-            data = response.json()
+            data = json_body(response)
             if "compliance_status" in data:
                 self.log_result("financial_infrastructure", "Enhanced Payment Processing", True)
             else:
@@ -432,7 +510,7 @@ class EnhancedFinancialTester:
         # Test transaction history with enhanced metadata
         success, response, error = self.make_request("GET", "/payments/enhanced/history")
         if success:
-            data = response.json()
+            data = json_body(response)
             if isinstance(data, list):
                 self.log_result("financial_infrastructure", "Enhanced Transaction History", True)
             else:
@@ -449,70 +527,60 @@ class EnhancedFinancialTester:
         """Run all enhanced financial infrastructure tests"""
         print("🚀 Starting Enhanced Financial Infrastructure Testing")
         print(f"Testing API at: {BASE_URL}")
-        print("=" * 70)
+        print(BANNER)
         
         # Setup authentication first
-        if not self.setup_authentication():
+        authenticated = self.setup_authentication()
+        self.flush_output()
+        if not authenticated:
             print("❌ Cannot proceed without authentication")
             return
         
         # Run enhanced test suites
-        self.test_enhanced_stripe_integration()
-        self.test_security_framework()
-        self.test_financial_infrastructure()
-        self.test_banking_integration()
-        self.test_compliance_systems()
-        self.test_enhanced_transaction_processing()
-        self.test_production_features()
+        try:
+            for suite in (
+                self.test_enhanced_stripe_integration,
+                self.test_security_framework,
+                self.test_financial_infrastructure,
+                self.test_banking_integration,
+                self.test_compliance_systems,
+                self.test_enhanced_transaction_processing,
+                self.test_production_features
+            ):
+                suite()
+                self.flush_output()
+        finally:
+            self.save_known_missing()
         
         # Print summary
         self.print_summary()
     
     def print_summary(self):
         """Print test results summary"""
-        print("\n" + "=" * 70)
-        print("📋 ENHANCED FINANCIAL INFRASTRUCTURE TEST RESULTS")
-        print("=" * 70)
-        
-        total_passed = 0
-        total_failed = 0
+        buckets = self.test_results.values()
+        total_passed = sum(map(itemgetter("passed"), buckets))
+        total_failed = sum(map(itemgetter("failed"), buckets))
         
+        lines = ["", BANNER, "📋 ENHANCED FINANCIAL INFRASTRUCTURE TEST RESULTS", BANNER]
         for category, results in self.test_results.items():
-            passed = results["passed"]
             failed = results["failed"]
-            total_passed += passed
-            total_failed += failed
-            
             status = "✅ PASS" if failed == 0 else "❌ FAIL"
-            print(f"{category.upper().replace('_', ' '):25} | {status} | {passed} passed, {failed} failed")
-            
-            if results["errors"]:
-                for error in results["errors"]:
-                    print(f"  └─ {error}")
+            lines.append(SUMMARY_ROW.format(category.upper().replace("_", " "), status, results["passed"], failed))
+            lines.extend(f"  └─ {test_name}: {error}" for test_name, error in results["errors"])
         
-        print("-" * 70)
         overall_status = "✅ ALL TESTS PASSED" if total_failed == 0 else f"❌ {total_failed} TESTS FAILED"
-        print(f"OVERALL RESULT: {overall_status}")
-        print(f"Total: {total_passed} passed, {total_failed} failed")
-        print("=" * 70)
+        lines += [
+            RULE,
+            f"OVERALL RESULT: {overall_status}",
+            f"Total: {total_passed} passed, {total_failed} failed",
+            BANNER
+        ]
         
         # Analysis of missing features
         if total_failed > 0:
-            print("\n📊 MISSING FINANCIAL INFRASTRUCTURE FEATURES:")
-            print("- AML Risk Assessment System")
-            print("- KYC Document Upload & Verification")
-            print("- OFAC Sanctions Screening")
-            print("- Multi-Signature Wallet Management")
-            print("- Plaid Banking Integration")
-            print("- ACH Processing Templates")
-            print("- Bank Account Verification")
-            print("- Compliance Monitoring System")
-            print("- Audit Trail Management")
-            print("- Regulatory Reporting")
-            print("- Advanced Risk Scoring")
-            print("- Security Encryption/Decryption APIs")
-            print("- Enhanced Transaction Processing with Compliance")
-            print("- Production Monitoring & Metrics")
+            lines += ["", "📊 MISSING FINANCIAL INFRASTRUCTURE FEATURES:"]
+            lines.extend(f"- {feature}" for feature in MISSING_FEATURES)
+        sys.stdout.write("\n".join(lines) + "\n")
 
 if __name__ == "__main__":
     tester = EnhancedFinancialTester()